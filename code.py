@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
-Smart Library - Seat Booking System (Auto Refresh 2s)
------------------------------------------------------
+Smart Library - Seat Booking System (Auto Refresh)
+--------------------------------------------------
 ✅ 50 seats (5x10)
 ✅ Green = Free | Red = Occupied
 ✅ Click seat → Book (Name, Mobile, Duration, Entry Time)
@@ -9,21 +9,24 @@ Smart Library - Seat Booking System (Auto Refresh 2s)
 ✅ Show all current bookings on main screen
 ✅ Search by seat number
 ✅ Reset all seats
-✅ Auto refresh every 2 seconds
+✅ Auto refresh whenever a countdown minute changes
 """
 
 import tkinter as tk
 from tkinter import messagebox
 import csv
+import os
 from pathlib import Path
 import threading
-import time
 from datetime import datetime, timedelta
 
 # ------------------ CONFIG ------------------
 NUM_SEATS = 50
 ROWS, COLS = 5, 10
-REFRESH_INTERVAL = 2  # seconds
+COMPACT_INTERVAL = 60  # minutes
+COMPACT_MAX_ROWS = 1000  # compact early once the log grows past this
+CSV_BUFFER_SIZE = 1 << 20  # bytes, for whole-file reads/rewrites
+LOG_BUFFER_SIZE = 1 << 16  # bytes, for the append-only log handle
 
 # ✅ Safe path setup (works in all environments)
 try:
@@ -32,69 +35,45 @@ except NameError:
     DATA_DIR = Path.cwd()
 
 BOOKINGS_CSV = DATA_DIR / "bookings.csv"
+FIELDNAMES = ("seat_id", "name", "mobile", "duration", "entry_time", "start_time", "status")
+CSV_LOCK = threading.RLock()  # guards every read/write of BOOKINGS_CSV
 
 # ------------------ CSV HANDLERS ------------------
 def ensure_csv():
     """Ensure bookings.csv file exists with headers."""
-    if not BOOKINGS_CSV.exists():
-        with open(BOOKINGS_CSV, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["seat_id", "name", "mobile", "duration", "entry_time", "start_time", "status"])
-
-def read_active_bookings():
+    with CSV_LOCK:
+        if not BOOKINGS_CSV.exists():
+            with open(BOOKINGS_CSV, "w", newline="", buffering=CSV_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(FIELDNAMES)
+
+def read_bookings():
+    """Return the latest record per seat, collapsing the append-only CSV log."""
+    state = {}
+    with CSV_LOCK:
+        if BOOKINGS_CSV.exists():
+            with open(BOOKINGS_CSV, newline="", buffering=CSV_BUFFER_SIZE) as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    state[int(row["seat_id"])] = row
+    return state
+
+def read_active_bookings(state=None):
     """Return a dict of currently active bookings."""
+    if state is None:
+        state = read_bookings()
     active = {}
-    if BOOKINGS_CSV.exists():
-        with open(BOOKINGS_CSV, newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row["status"] == "Occupied":
-                    start = datetime.strptime(row["start_time"], "%Y-%m-%d %H:%M:%S")
-                    duration = int(row["duration"])
-                    end = start + timedelta(minutes=duration)
-                    if datetime.now() < end:
-                        active[int(row["seat_id"])] = (end, row["name"], row["mobile"], row["entry_time"])
+    now = datetime.now()
+    for sid, row in state.items():
+        if row["status"] == "Occupied":
+            # start_time is written as ISO-8601, so the C fast path applies
+            start = datetime.fromisoformat(row["start_time"])
+            duration = int(row["duration"])
+            end = start + timedelta(minutes=duration)
+            if now < end:
+                active[sid] = (end, row["name"], row["mobile"], row["entry_time"])
     return active
 
-def add_booking(seat_id, name, mobile, duration, entry_time):
-    """Add or update a booking in the CSV."""
-    start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    rows = []
-    if BOOKINGS_CSV.exists():
-        with open(BOOKINGS_CSV, newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if int(row["seat_id"]) != seat_id:
-                    rows.append(row)
-    rows.append({
-        "seat_id": seat_id,
-        "name": name,
-        "mobile": mobile,
-        "duration": duration,
-        "entry_time": entry_time,
-        "start_time": start_time,
-        "status": "Occupied"
-    })
-    with open(BOOKINGS_CSV, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["seat_id", "name", "mobile", "duration", "entry_time", "start_time", "status"])
-        writer.writeheader()
-        writer.writerows(rows)
-
-def update_booking_status(seat_id, status):
-    """Update booking status (Free or Occupied)."""
-    rows = []
-    if BOOKINGS_CSV.exists():
-        with open(BOOKINGS_CSV, newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if int(row["seat_id"]) == seat_id:
-                    row["status"] = status
-                rows.append(row)
-    with open(BOOKINGS_CSV, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["seat_id", "name", "mobile", "duration", "entry_time", "start_time", "status"])
-        writer.writeheader()
-        writer.writerows(rows)
-
 # ------------------ MAIN APP ------------------
 class SmartLibraryApp(tk.Tk):
     def __init__(self):
@@ -103,13 +82,111 @@ class SmartLibraryApp(tk.Tk):
         self.geometry("1200x700")
         self.resizable(False, False)
 
-        self.active = read_active_bookings()
+        # In-memory state is authoritative; the CSV is an append-only log of it.
+        self.state = read_bookings()
+        self.active = read_active_bookings(self.state)
         self.buttons = {}
+        self.button_vars = {}  # sid -> StringVar bound to the button label
+        self._btn_state = {}  # sid -> (bg, text) last applied to the button
+        self._last_rows = None  # rows last rendered in the booking list
+        self._tick_job = None
+        self._timers = {}
+        self._pending = []  # delta rows waiting to be written in one batch
+
+        self._csv_fh = None
+        self.compact_csv()  # collapse the log left by the previous run
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.create_ui()
-        self.refresh_ui()
-        self.auto_refresh()
-        threading.Thread(target=self.auto_reset_thread, daemon=True).start()
+        self.tick()
+        self.after(COMPACT_INTERVAL * 60 * 1000, self.auto_compact)
+        for sid in self.active:
+            self.schedule_expiry(sid)
+
+    # ------------------ PERSISTENCE ------------------
+    def _open_log(self):
+        """Open the CSV in append mode with a long-lived DictWriter."""
+        self._csv_fh = open(BOOKINGS_CSV, "a", newline="", buffering=LOG_BUFFER_SIZE)
+        self._writer = csv.DictWriter(self._csv_fh, fieldnames=FIELDNAMES)
+
+    def add_booking(self, seat_id, name, mobile, duration, entry_time):
+        """Record a booking in memory and append it to the CSV log."""
+        row = {
+            "seat_id": seat_id,
+            "name": name,
+            "mobile": mobile,
+            "duration": duration,
+            "entry_time": entry_time,
+            "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "Occupied"
+        }
+        with CSV_LOCK:
+            self.state[seat_id] = row
+            self._write_row(row)
+
+    def update_booking_status(self, seat_id, status, defer=False):
+        """Update booking status by appending the updated record (queued if defer)."""
+        row = dict(self.state.get(seat_id) or dict.fromkeys(FIELDNAMES, ""))
+        row["seat_id"] = seat_id
+        row["status"] = status
+        with CSV_LOCK:
+            self.state[seat_id] = row
+            if defer:
+                if not self._pending:
+                    self.after(50, self._flush_pending)
+                self._pending.append(row)
+            else:
+                self._write_row(row)
+
+    def _write_row(self, row):
+        self._pending.append(row)  # queued rows go first, keeping mutation order
+        self._flush_pending()
+
+    def _flush_pending(self):
+        with CSV_LOCK:
+            if self._pending:
+                self._writer.writerows(self._pending)
+                self._csv_fh.flush()
+                self._row_count += len(self._pending)
+                self._pending.clear()
+                self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._row_count > COMPACT_MAX_ROWS:
+            self.compact_csv()
+
+    def compact_csv(self):
+        """Rewrite the CSV log from the in-memory state, one row per seat."""
+        with CSV_LOCK:
+            tmp = BOOKINGS_CSV.with_name(BOOKINGS_CSV.name + ".tmp")
+            try:
+                with open(tmp, "w", newline="", buffering=CSV_BUFFER_SIZE) as f:
+                    writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                    writer.writeheader()
+                    writer.writerows(self.state.values())
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._csv_fh is not None:
+                    self._csv_fh.close()  # an open file cannot be replaced on Windows
+                    self._csv_fh = None
+                os.replace(tmp, BOOKINGS_CSV)
+                self._pending.clear()  # already reflected in the new file
+                self._row_count = len(self.state)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()  # only left behind if a step above failed
+                if self._csv_fh is None:
+                    self._open_log()
+
+    def auto_compact(self):
+        self.compact_csv()
+        self.after(COMPACT_INTERVAL * 60 * 1000, self.auto_compact)
+
+    def on_close(self):
+        with CSV_LOCK:
+            self._flush_pending()
+            self._csv_fh.close()
+        self.destroy()
 
     # ------------------ UI LAYOUT ------------------
     def create_ui(self):
@@ -121,11 +198,14 @@ class SmartLibraryApp(tk.Tk):
         for r in range(ROWS):
             for c in range(COLS):
                 sid = r * COLS + c + 1
-                btn = tk.Button(grid_frame, text=f"{sid}", width=12, height=4,
+                sv = tk.StringVar(value=str(sid))
+                btn = tk.Button(grid_frame, textvariable=sv, width=12, height=4,
                                  bg="lightgreen", font=("Arial", 10, "bold"),
                                  command=lambda s=sid: self.book_or_reset(s))
                 btn.grid(row=r, column=c, padx=5, pady=5)
                 self.buttons[sid] = btn
+                self.button_vars[sid] = sv
+                self._btn_state[sid] = ("lightgreen", str(sid))
 
         # Control buttons
         control_frame = tk.Frame(self)
@@ -137,7 +217,6 @@ class SmartLibraryApp(tk.Tk):
         tk.Label(self, text="📋 Current Active Bookings", font=("Arial", 14, "bold")).pack(pady=10)
         self.text_box = tk.Text(self, height=15, width=80, font=("Courier", 10))
         self.text_box.pack()
-        self.refresh_booking_list()
 
     # ------------------ BUTTON LOGIC ------------------
     def book_or_reset(self, seat_id):
@@ -170,16 +249,17 @@ class SmartLibraryApp(tk.Tk):
                 mobile = entries["Mobile"].get().strip()
                 duration = int(entries["Duration (min)"].get().strip())
                 entry_time = entries["Entry Time (HH:MM 24hr)"].get().strip()
-                if not name or not mobile or not entry_time:
+                if not name or not mobile or not entry_time or duration <= 0:
                     raise ValueError
             except:
                 messagebox.showerror("Error", "Invalid input.")
                 return
 
-            add_booking(seat_id, name, mobile, duration, entry_time)
-            self.active = read_active_bookings()
-            self.refresh_ui()
-            self.refresh_booking_list()
+            self.add_booking(seat_id, name, mobile, duration, entry_time)
+            # update in place: self.active is only ever mutated, never rebound
+            self.active.update(read_active_bookings({seat_id: self.state[seat_id]}))
+            self.schedule_expiry(seat_id)
+            self.tick()
             popup.destroy()
             messagebox.showinfo("Booked", f"Seat {seat_id} booked for {duration} mins.")
 
@@ -188,62 +268,98 @@ class SmartLibraryApp(tk.Tk):
 
     # ------------------ AUTO / RESET ------------------
     def reset_seat(self, seat_id):
-        update_booking_status(seat_id, "Free")
+        self.cancel_expiry(seat_id)
+        self.update_booking_status(seat_id, "Free")
         self.active.pop(seat_id, None)
-        self.refresh_ui()
-        self.refresh_booking_list()
+        self.tick()
 
     def reset_all(self):
         if messagebox.askyesno("Confirm", "Are you sure to reset ALL seats?"):
-            ensure_csv()  # recreate CSV with header
+            for sid in list(self._timers):
+                self.cancel_expiry(sid)
+            self.state.clear()
             self.active.clear()
-            self.refresh_ui()
-            self.refresh_booking_list()
+            self.compact_csv()  # rewrite CSV with header only
+            self.tick()
             messagebox.showinfo("Reset", "All seats reset successfully!")
 
-    def auto_reset_thread(self):
-        """Thread to auto-free expired seats."""
-        while True:
-            now = datetime.now()
-            for seat_id, (end, name, mobile, etime) in list(self.active.items()):
-                if now >= end:
-                    update_booking_status(seat_id, "Free")
-                    self.active.pop(seat_id, None)
-                    self.after(0, lambda s=seat_id, n=name: messagebox.showinfo("Time Over", f"Seat {s} ({n}) time ended."))
-                    self.after(0, self.refresh_ui)
-                    self.after(0, self.refresh_booking_list)
-            time.sleep(1)
+    def schedule_expiry(self, seat_id):
+        """Schedule the seat to be freed exactly when its booking ends."""
+        self.cancel_expiry(seat_id)  # a rebooking replaces the old timer
+        if seat_id not in self.active:
+            return
+        end = self.active[seat_id][0]
+        ms = max(0, int((end - datetime.now()).total_seconds() * 1000))
+        self._timers[seat_id] = self.after(ms, self._expire, seat_id)
+
+    def cancel_expiry(self, seat_id):
+        timer = self._timers.pop(seat_id, None)
+        if timer is not None:
+            self.after_cancel(timer)
+
+    def _expire(self, seat_id):
+        """Free a seat whose booking time has ended."""
+        self._timers.pop(seat_id, None)
+        booking = self.active.get(seat_id)
+        if booking is None:
+            return
+        if datetime.now() < booking[0]:
+            self.schedule_expiry(seat_id)  # fired early, e.g. ms rounding
+            return
+        del self.active[seat_id]
+        self.update_booking_status(seat_id, "Free", defer=True)
+        self.tick()
+        messagebox.showinfo("Time Over", f"Seat {seat_id} ({booking[1]}) time ended.")
 
     # ------------------ REFRESH ------------------
-    def refresh_ui(self):
-        self.active = read_active_bookings()
+    def refresh_ui(self, now):
         for sid, btn in self.buttons.items():
             if sid in self.active:
                 end, name, mobile, etime = self.active[sid]
-                left = int((end - datetime.now()).total_seconds() // 60)
-                btn.config(bg="red", text=f"{sid}\n{name}\n{left}m left")
+                left = int((end - now).total_seconds() // 60)
+                desired = ("red", f"{sid}\n{name}\n{left}m left")
             else:
-                btn.config(bg="lightgreen", text=f"{sid}")
-        self.refresh_booking_list()
+                desired = ("lightgreen", f"{sid}")
+            # every Tk call round-trips through Tcl, so only touch what changed
+            old_bg, old_text = self._btn_state[sid]
+            if (old_bg, old_text) != desired:
+                bg, text = desired
+                if text != old_text:
+                    self.button_vars[sid].set(text)
+                if bg != old_bg:
+                    btn.config(bg=bg)
+                self._btn_state[sid] = desired
+
+    def refresh_booking_list(self, now):
+        rows = tuple((sid, name, mobile, etime, int((end - now).total_seconds() // 60))
+                     for sid, (end, name, mobile, etime) in sorted(self.active.items()))
+        if rows == self._last_rows:
+            return  # nothing visible changed, skip the rebuild
+        self._last_rows = rows
 
-    def refresh_booking_list(self):
         self.text_box.config(state="normal")
         self.text_box.delete("1.0", tk.END)
-        active = read_active_bookings()
-        if active:
-            now = datetime.now()
+        if rows:
             self.text_box.insert(tk.END, f"{'Seat':<6}{'Name':<15}{'Mobile':<15}{'Entry':<10}{'Left':<10}\n")
             self.text_box.insert(tk.END, "-"*60 + "\n")
-            for sid, (end, name, mobile, etime) in active.items():
-                left = int((end - now).total_seconds() // 60)
+            for sid, name, mobile, etime, left in rows:
                 self.text_box.insert(tk.END, f"{sid:<6}{name:<15}{mobile:<15}{etime:<10}{left}m\n")
         else:
             self.text_box.insert(tk.END, "No active bookings.\n")
         self.text_box.config(state="disabled")
 
-    def auto_refresh(self):
-        self.refresh_ui()
-        self.after(REFRESH_INTERVAL * 1000, self.auto_refresh)
+    def tick(self):
+        """Redraw seats and the booking list, then schedule the next tick."""
+        if self._tick_job is not None:
+            self.after_cancel(self._tick_job)  # a mutation refreshed early
+            self._tick_job = None
+        now = datetime.now()  # one clock read shared by the whole tick
+        self.refresh_ui(now)
+        self.refresh_booking_list(now)
+        self.update_idletasks()
+        if self.active:
+            wait = min((end - now).total_seconds() % 60 for end, *_ in self.active.values())
+            self._tick_job = self.after(int(wait * 1000) + 50, self.tick)
 
     # ------------------ SEARCH ------------------
     def search_by_seat(self):
@@ -265,7 +381,7 @@ class SmartLibraryApp(tk.Tk):
             except:
                 messagebox.showerror("Error", "Enter a valid seat number (1–50).")
                 return
-            booking = read_active_bookings().get(sid)
+            booking = self.active.get(sid)
             if booking:
                 end, name, mobile, etime = booking
                 mins = int((end - datetime.now()).total_seconds() // 60)